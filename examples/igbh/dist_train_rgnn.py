@@ -26,7 +26,7 @@ import torch.nn.functional as F
 
 from torch.nn.parallel import DistributedDataParallel
 
-from rgnn import RGNN
+from rgnn import RGNNClassifier
 
 
 torch.manual_seed(42)
@@ -48,7 +48,8 @@ def evaluate(model, dataloader):
     return acc
 
 def run_training_proc(local_proc_rank, num_nodes, node_rank, num_training_procs,
-    hidden_channels, num_classes, num_layers, model_type, num_heads, fan_out,
+    hidden_channels, num_classes, num_layers, model_type, num_heads, chunk_size,
+    fan_out,
     epochs, batch_size, learning_rate, log_every,
     dataset, train_idx, val_idx, test_idx,
     master_addr,
@@ -57,7 +58,10 @@ def run_training_proc(local_proc_rank, num_nodes, node_rank, num_training_procs,
     val_loader_master_port,
     test_loader_master_port,
     with_gpu,
-    rpc_timeout):
+    rpc_timeout,
+    compile_model,
+    fuse_lin,
+    autocast_bf16):
   # Initialize graphlearn_torch distributed worker group context.
   glt.distributed.init_worker_group(
     world_size=num_nodes*num_training_procs,
@@ -138,15 +142,21 @@ def run_training_proc(local_proc_rank, num_nodes, node_rank, num_training_procs,
   # Define model and optimizer.
   if with_gpu:
     torch.cuda.set_device(current_device)
-  model = RGNN(dataset.get_edge_types(),
-               dataset.node_features['paper'].shape[1],
-               hidden_channels,
-               num_classes,
-               num_layers=num_layers,
-               dropout=0.2,
-               model=model_type,
-               heads=num_heads,
-               node_type='paper').to(current_device)
+  model = RGNNClassifier(dataset.get_edge_types(),
+                         dataset.node_features['paper'].shape[1],
+                         hidden_channels,
+                         num_classes,
+                         num_layers=num_layers,
+                         dropout=0.2,
+                         model=model_type,
+                         heads=num_heads,
+                         node_type='paper',
+                         fuse_lin=fuse_lin,
+                         autocast_dtype=(torch.bfloat16 if autocast_bf16
+                                         else None),
+                         chunk_size=chunk_size).to(current_device)
+  if compile_model:
+    model = torch.compile(model, dynamic=True)
   model = DistributedDataParallel(model,
                                   device_ids=[current_device.index] if with_gpu else None,
                                   find_unused_parameters=True)
@@ -245,6 +255,10 @@ if __name__ == '__main__':
   parser.add_argument('--epochs', type=int, default=20)
   parser.add_argument('--num_layers', type=int, default=6)
   parser.add_argument('--num_heads', type=int, default=4)
+  parser.add_argument('--chunk_size', type=int, default=None,
+      help='number of edges aggregated at a time by the rgat convs in '
+           'evaluation, which saves memory but is slower; ignored in '
+           'training, default is all edges at once')
   parser.add_argument('--log_every', type=int, default=5)
   # Distributed settings.
   parser.add_argument("--num_nodes", type=int, default=2,
@@ -267,6 +281,15 @@ if __name__ == '__main__':
       help="Only use CPU for sampling and training, default is False.")
   parser.add_argument("--rpc_timeout", type=int, default=180,
                       help="rpc timeout in seconds")
+  parser.add_argument("--fuse_lin", action="store_true",
+      help="Output the classes from the last conv layer instead of a linear "
+           "classifier, default is False.")
+  parser.add_argument("--autocast_bf16", action="store_true",
+      help="Run the model forward under bfloat16 autocast on GPU, "
+           "default is False.")
+  parser.add_argument("--compile", action="store_true",
+      help="Compile the model with torch.compile (requires torch>=2.0), "
+           "default is False.")
   args = parser.parse_args()
   # when set --cpu_mode or GPU is not available, use cpu only mode.
   args.with_gpu = (not args.cpu_mode) and torch.cuda.is_available()
@@ -300,7 +323,8 @@ if __name__ == '__main__':
   torch.multiprocessing.spawn(
     run_training_proc,
     args=(args.num_nodes, args.node_rank, args.num_training_procs,
-          args.hidden_channels, args.num_classes, args.num_layers, args.model, args.num_heads, args.fan_out,
+          args.hidden_channels, args.num_classes, args.num_layers, args.model, args.num_heads, args.chunk_size,
+          args.fan_out,
           args.epochs, args.batch_size, args.learning_rate, args.log_every,
           dataset, train_idx, val_idx, test_idx,
           args.master_addr,
@@ -309,7 +333,10 @@ if __name__ == '__main__':
           args.val_loader_master_port,
           args.test_loader_master_port,
           args.with_gpu,
-          args.rpc_timeout),
+          args.rpc_timeout,
+          args.compile,
+          args.fuse_lin,
+          args.autocast_bf16),
     nprocs=args.num_training_procs,
     join=True
   )
@@ -13,10 +13,335 @@
 # limitations under the License.
 # ==============================================================================
 
+from typing import List, Optional
+
 import torch
 import torch.nn.functional as F
 
-from torch_geometric.nn import HeteroConv, GATConv, GCNConv, SAGEConv
+from torch_geometric.nn import HeteroConv, GCNConv, SAGEConv
+from torch_geometric.nn.inits import glorot, zeros
+from torch_scatter import gather_csr, scatter, segment_csr
+from torch_scatter.composite import scatter_softmax
+
+# In-place multi-tensor maximum is not available in older PyTorch versions.
+_HAS_FOREACH_MAXIMUM = hasattr(torch, '_foreach_maximum_')
+
+
+def _base_etype(etype, etypes):
+  r""" Map a reverse edge type ``(dst, 'rev_<rel>', src)`` to its forward
+  edge type ``(src, '<rel>', dst)`` if the latter is in ``etypes``.
+  """
+  src, rel, dst = etype
+  if rel.startswith('rev_') and (dst, rel[4:], src) in etypes:
+    return (dst, rel[4:], src)
+  return etype
+
+
+def sort_edge_index_dict(edge_index_dict):
+  r""" Sort the edges of every edge type by destination node.
+  """
+  return {etype: edge_index[:, edge_index[1].argsort()]
+          for etype, edge_index in edge_index_dict.items()}
+
+
+def _group_relations(etypes):
+  r""" Order relations so that the ones into the same destination node type
+  are adjacent. Returns the order as indices into ``etypes``, the positions
+  in this order of the relations from each source node type, and the
+  destination node types with the positions of the relations into each.
+  """
+  dst_groups = {}
+  for r, etype in enumerate(etypes):
+    dst_groups.setdefault(etype[2], []).append(r)
+  order = [r for rs in dst_groups.values() for r in rs]
+  src_rels, dst_rels = {}, {}
+  for p, r in enumerate(order):
+    src_rels.setdefault(etypes[r][0], []).append(p)
+    dst_rels.setdefault(etypes[r][2], []).append(p)
+  return (order, list(src_rels.values()), list(dst_rels.keys()),
+          list(dst_rels.values()))
+
+
+def _index2ptr(index: torch.Tensor, size: int) -> torch.Tensor:
+  r""" Convert a sorted index tensor into a CSR pointer of ``size`` segments.
+  """
+  ptr = index.new_zeros(size + 1)
+  ptr[1:] = torch.bincount(index, minlength=size).cumsum(0)
+  return ptr
+
+
+def _segment_softmax(src: torch.Tensor, ptr: torch.Tensor) -> torch.Tensor:
+  r""" Softmax over the contiguous segments of ``src`` given by ``ptr``.
+  """
+  src_max = segment_csr(src, ptr, reduce='max').detach()
+  out = (src - gather_csr(src_max, ptr)).exp()
+  out_sum = segment_csr(out, ptr, reduce='sum') + 1e-16
+  return out / gather_csr(out_sum, ptr)
+
+
+class FusedHeteroGATConv(torch.nn.Module):
+  r""" A multi-relation GAT layer equivalent to ``HeteroConv`` over one
+  ``GATConv`` per edge type (with ``add_self_loops=False`` and ``aggr='sum'``),
+  but computed with one batched GEMM and one softmax/scatter over the edges of
+  all relations, instead of launching a separate conv for every relation.
+
+  Args:
+    etypes: edge types.
+    in_channels: input size, shared by all node types.
+    out_channels: output size of each attention head.
+    heads: Number of multi-head-attentions.
+    concat: Whether to concatenate or average the outputs of the heads.
+    negative_slope: LeakyReLU angle of the negative slope for attention.
+    bias: Whether to learn an additive bias per relation.
+    share_rev_etypes: Whether a reverse edge type ``(dst, 'rev_<rel>', src)``
+      shares its parameters with the edge type ``(src, '<rel>', dst)``.
+    chunk_size: If set, gather and aggregate the messages in blocks of this
+      many edges when no gradients are required, which bounds the peak
+      memory of the messages for evaluation with large fan-outs at the cost
+      of a few kernel launches per block. Ignored under autograd.
+  """
+  chunk_size: Optional[int]
+
+  def __init__(self, etypes, in_channels, out_channels, heads=1, concat=True,
+               negative_slope=0.2, bias=True, share_rev_etypes=False,
+               chunk_size=None):
+    super().__init__()
+    self.etypes = [tuple(etype) for etype in etypes]
+    # The parameter slot used by each relation.
+    slot_dict, self._slots = {}, []
+    for etype in self.etypes:
+      if share_rev_etypes:
+        etype = _base_etype(etype, self.etypes)
+      self._slots.append(slot_dict.setdefault(etype, len(slot_dict)))
+    self.register_buffer('slot_index', torch.tensor(self._slots),
+                         persistent=False)
+    self.in_channels = in_channels
+    self.out_channels = out_channels
+    self.heads = heads
+    self.concat = concat
+    self.negative_slope = negative_slope
+    self.chunk_size = chunk_size
+
+    num_slots = len(slot_dict)
+    self.weight = torch.nn.Parameter(
+      torch.empty(num_slots, in_channels, heads * out_channels))
+    self.att_src = torch.nn.Parameter(
+      torch.empty(num_slots, heads, out_channels))
+    self.att_dst = torch.nn.Parameter(
+      torch.empty(num_slots, heads, out_channels))
+    if bias:
+      self.bias = torch.nn.Parameter(torch.empty(
+        num_slots, heads * out_channels if concat else out_channels))
+    else:
+      self.register_parameter('bias', None)
+    self._plans = {}
+    self.reset_parameters()
+
+  def reset_parameters(self):
+    glorot(self.weight)
+    glorot(self.att_src)
+    glorot(self.att_dst)
+    zeros(self.bias)
+
+  def _get_plan(self, x_dict, edge_index_dict):
+    r""" Get the relations present in the inputs, grouped by destination
+    node type (see :func:`_group_relations`), the parameter slots of the
+    relations in source and in destination order, the positions of the
+    relations from each source node type, the destination node types and the
+    positions of the relations into each of them. The plan only depends on
+    which relations are present, so it is cached for the following batches.
+    """
+    present = tuple(etype in edge_index_dict
+                    and etype[0] in x_dict and etype[2] in x_dict
+                    for etype in self.etypes)
+    key = (present, self.weight.device)
+    plan = self._plans.get(key)
+    if plan is None:
+      rels = [r for r, p in enumerate(present) if p]
+      order, src_rels, dst_types, dst_rels = _group_relations(
+        [self.etypes[r] for r in rels])
+      rels = [rels[i] for i in order]
+      src_slots = [self._slots[rels[p]] for pos in src_rels for p in pos]
+      dst_slots = [self._slots[r] for r in rels]
+      plan = (rels, torch.tensor(src_slots, device=self.weight.device),
+              torch.tensor(dst_slots, device=self.weight.device),
+              src_rels, dst_types, dst_rels)
+      self._plans[key] = plan
+    return plan
+
+  @torch.jit.unused
+  def forward(self, x_dict, edge_index_dict, is_sorted=False):
+    r""" If ``is_sorted`` is set, the edges of every relation must be sorted
+    by destination node (see :func:`sort_edge_index_dict`), which lets the
+    attention softmax and aggregation run as segment reductions over
+    contiguous edges instead of scatters with atomics.
+    """
+    rels, src_slot_index, dst_slot_index, src_rels, dst_types, dst_rels = \
+      self._get_plan(x_dict, edge_index_dict)
+    if len(rels) == 0:
+      return {}
+    outs = self.propagate(
+      [x_dict[self.etypes[r][0]] for r in rels],
+      [x_dict[self.etypes[r][2]] for r in rels],
+      [edge_index_dict[self.etypes[r]] for r in rels],
+      src_slot_index, dst_slot_index, src_rels, dst_rels, is_sorted)
+    return dict(zip(dst_types, outs))
+
+  @torch.jit.export
+  def propagate(self, xs_src: List[torch.Tensor], xs_dst: List[torch.Tensor],
+                edge_indexes: List[torch.Tensor], src_slot_index: torch.Tensor,
+                dst_slot_index: torch.Tensor, src_rels: List[List[int]],
+                dst_rels: List[List[int]],
+                is_sorted: bool) -> List[torch.Tensor]:
+    r""" The TorchScript compatible body of :meth:`forward`, on the source
+    features, destination features and edge indexes of each relation, where
+    the relations into the same destination node type are adjacent. The
+    parameter slots of the relations are given in the order of the source
+    groups ``src_rels`` and in the order of the relations respectively.
+    Returns the outputs of the destination node types, each of which
+    aggregates the relations at the positions given by ``dst_rels``.
+    """
+    num_rels = len(edge_indexes)
+    H, C = self.heads, self.out_channels
+    in_channels = self.in_channels
+    device = edge_indexes[0].device
+
+    # Project each source node type with one GEMM against the weights of all
+    # relations from it. Row ``n * k + c`` of a group holds node ``n`` for
+    # its ``c``-th of ``k`` relations.
+    weight = self.weight.index_select(0, src_slot_index)
+    att_src = self.att_src.index_select(0, src_slot_index)
+    h_parts: List[torch.Tensor] = []
+    alpha_src_parts: List[torch.Tensor] = []
+    src_mult = [0] * num_rels
+    src_base = [0] * num_rels
+    start, num_rows = 0, 0
+    for pos in src_rels:
+      k = len(pos)
+      x = xs_src[pos[0]]
+      w = weight.narrow(0, start, k).transpose(0, 1).reshape(in_channels, -1)
+      h = torch.mm(x, w).view(-1, k, H, C)
+      alpha_src_parts.append(
+        (h * att_src.narrow(0, start, k)).sum(dim=-1).view(-1, H))
+      h_parts.append(h.view(-1, H, C))
+      for c, i in enumerate(pos):
+        src_mult[i] = k
+        src_base[i] = num_rows + c
+      start += k
+      num_rows += x.size(0) * k
+    h = torch.cat(h_parts)
+    alpha_src = torch.cat(alpha_src_parts)
+
+    # Only the attention logits of the destination nodes are needed, so fold
+    # ``att_dst`` into the weight instead of projecting the full features, and
+    # compute the logits of all relations into a node type with one GEMM.
+    w_dst = (self.weight.view(self.weight.size(0), -1, H, C) *
+             self.att_dst.unsqueeze(1)).sum(dim=-1)
+    w_dst = w_dst.index_select(0, dst_slot_index)
+    alpha_dst_parts: List[torch.Tensor] = []
+    dst_mult = [0] * num_rels
+    dst_base = [0] * num_rels
+    out_offset = [0] * num_rels
+    sizes: List[int] = []
+    num_rows, num_out = 0, 0
+    for pos in dst_rels:
+      k = len(pos)
+      x = xs_dst[pos[0]]
+      w = w_dst.narrow(0, pos[0], k).transpose(0, 1).reshape(in_channels, -1)
+      alpha_dst_parts.append(torch.mm(x, w).view(-1, H))
+      for c, i in enumerate(pos):
+        dst_mult[i] = k
+        dst_base[i] = num_rows + c
+        out_offset[i] = num_out
+      num_rows += x.size(0) * k
+      num_out += x.size(0)
+      sizes.append(x.size(0))
+    alpha_dst = torch.cat(alpha_dst_parts)
+    num_dst = max(sizes)
+
+    # Flatten the edges of all relations and offset their node indices with
+    # one lookup of the per-relation offsets by the relation of each edge.
+    # Segment ``r * num_dst + v`` holds the edges of relation ``r`` into node
+    # ``v``, so ``seg_index`` stays sorted if every relation is.
+    counts = [edge_index.size(1) for edge_index in edge_indexes]
+    edge_index = torch.cat(edge_indexes, dim=1)
+    table = torch.tensor([src_mult, src_base, dst_mult, dst_base, out_offset],
+                         device=device)
+    rel = torch.repeat_interleave(
+      torch.arange(num_rels, device=device),
+      torch.tensor(counts, device=device), dim=0,
+      output_size=edge_index.size(1))
+    offsets = table.index_select(1, rel)
+    src_index = edge_index[0] * offsets[0] + offsets[1]
+    seg_index = edge_index[1] + rel * num_dst
+
+    # Keep the attention softmax in full precision under autocast, which
+    # leaves the elementwise and scatter ops in the dtype of their inputs.
+    alpha = (alpha_src.float()[src_index] +
+             alpha_dst.float()[edge_index[1] * offsets[2] + offsets[3]])
+    alpha = F.leaky_relu(alpha, self.negative_slope)
+
+    bias = self.bias
+    if bias is not None:
+      bias = bias.index_select(0, dst_slot_index)
+    # Under autograd every gathered chunk is kept for backward, so chunking
+    # would only add launches without bounding the memory.
+    chunk = 0
+    chunk_size = self.chunk_size
+    if (chunk_size is not None and not torch.is_grad_enabled()
+        and src_index.numel() > chunk_size):
+      chunk = chunk_size
+    results: List[torch.Tensor] = []
+    if is_sorted:
+      ptr = _index2ptr(seg_index, num_rels * num_dst)
+      alpha = _segment_softmax(alpha, ptr)
+      if chunk == 0:
+        msg = h[src_index] * alpha.unsqueeze(-1)
+        agg = segment_csr(msg, ptr, reduce='sum').view(
+          num_rels, num_dst, H, C)
+        for pos, size in zip(dst_rels, sizes):
+          x = agg.narrow(0, pos[0], len(pos)).narrow(1, 0, size).sum(dim=0)
+          results.append(self._finish(x, bias, pos))
+        return results
+    else:
+      alpha = scatter_softmax(alpha, seg_index, dim=0,
+                              dim_size=num_rels * num_dst)
+    out_index = edge_index[1] + offsets[4]
+    if chunk == 0:
+      msg = h[src_index] * alpha.unsqueeze(-1)
+      out = scatter(msg, out_index, dim=0, dim_size=num_out, reduce='sum')
+    else:
+      dtype = torch.promote_types(h.dtype, alpha.dtype)
+      out = h.new_zeros([num_out, H, C], dtype=dtype)
+      for start in range(0, src_index.numel(), chunk):
+        end = start + chunk
+        msg = h[src_index[start:end]] * alpha[start:end].unsqueeze(-1)
+        out.index_add_(0, out_index[start:end], msg)
+    offset = 0
+    for pos, size in zip(dst_rels, sizes):
+      # ``narrow`` rather than ``split``, as callers may modify the outputs
+      # in-place, which autograd forbids for the multiple views of ``split``.
+      results.append(self._finish(out.narrow(0, offset, size), bias, pos))
+      offset += size
+    return results
+
+  def _finish(self, x: torch.Tensor, bias: Optional[torch.Tensor],
+              pos: List[int]) -> torch.Tensor:
+    r""" Concatenate or average the heads of the aggregated messages ``x`` of
+    a destination node type, and add the biases of its relations at ``pos``.
+    """
+    if self.concat:
+      x = x.reshape(-1, self.heads * self.out_channels)
+    else:
+      x = x.mean(dim=1)
+    if bias is not None:
+      x = x + bias.narrow(0, pos[0], len(pos)).sum(dim=0)
+    return x
+
+  def __repr__(self):
+    return (f'{self.__class__.__name__}({self.in_channels}, '
+            f'{self.out_channels}, heads={self.heads}, '
+            f'num_relations={len(self.etypes)})')
 
 
 class RGNN(torch.nn.Module):
@@ -32,36 +357,249 @@ class RGNN(torch.nn.Module):
     model: "rsage" or "rgat".
     heads: Number of multi-head-attentions for GAT.
     node_type: The predict node type for node classification.
+    tie_weights: Whether consecutive conv layers with the same shape share
+      one conv, and each ``rev_`` edge type shares its conv with the forward
+      edge type.
+    fuse_lin: Whether the last conv layer directly outputs ``out_dim`` for
+      ``node_type`` instead of being followed by a linear classifier. The
+      heads of the last GAT layer are averaged in this case.
+    autocast_dtype: If set to ``torch.bfloat16``, run the forward pass on
+      CUDA under ``torch.autocast`` and return the outputs in float32, so that
+      the loss is computed in full precision. float16 is not supported, as it
+      would also need a ``GradScaler`` in the training loop.
+    chunk_size: If set, the "rgat" convs aggregate the messages in blocks of
+      this many edges in evaluation without gradients, which saves memory
+      but is slower, see :class:`FusedHeteroGATConv`.
 
   """
   def __init__(self, etypes, in_dim, h_dim, out_dim, num_layers=2,
-               dropout=0.2, model='rgat', heads=4, node_type=None):
+               dropout=0.2, model='rgat', heads=4, node_type=None,
+               tie_weights=False, fuse_lin=False, autocast_dtype=None,
+               chunk_size=None):
     super().__init__()
+    if autocast_dtype not in (None, torch.bfloat16):
+      raise ValueError(f"'{self.__class__.__name__}': unsupported "
+                       f"autocast_dtype {autocast_dtype}, only torch.bfloat16 "
+                       f"is supported")
+    self.etypes = [tuple(etype) for etype in etypes]
     self.node_type = node_type
-    if node_type is not None:
+    self.autocast_dtype = autocast_dtype
+    self._has_lin = node_type is not None and not fuse_lin
+    if self._has_lin:
       self.lin = torch.nn.Linear(h_dim, out_dim)
 
     self.convs = torch.nn.ModuleList()
+    conv_shape = None
     for i in range(num_layers):
+      last = (i == num_layers - 1)
       in_dim = in_dim if i == 0 else h_dim
-      h_dim = out_dim if (i == (num_layers - 1) and node_type is None) else h_dim
+      h_dim = out_dim if (last and (node_type is None or fuse_lin)) else h_dim
+      concat = not (last and node_type is not None and fuse_lin)
+      if tie_weights and conv_shape == (in_dim, h_dim, concat):
+        self.convs.append(self.convs[-1])
+        continue
+      conv_shape = (in_dim, h_dim, concat)
       if model == 'rsage':
-        self.convs.append(HeteroConv({
-            etype: SAGEConv(in_dim, h_dim, root_weight=False)
-            for etype in etypes}))
+        sage_convs, shared_convs = {}, {}
+        for etype in etypes:
+          key = _base_etype(etype, etypes) if tie_weights else etype
+          if key not in shared_convs:
+            shared_convs[key] = SAGEConv(in_dim, h_dim, root_weight=False)
+          sage_convs[etype] = shared_convs[key]
+        self.convs.append(HeteroConv(sage_convs))
       elif model == 'rgat':
-        self.convs.append(HeteroConv({
-            etype: GATConv(in_dim, h_dim // heads, heads=heads, add_self_loops=False)
-            for etype in etypes}))
-    self.dropout = torch.nn.Dropout(dropout)
+        self.convs.append(
+          FusedHeteroGATConv(etypes, in_dim,
+                             h_dim // heads if concat else h_dim,
+                             heads=heads, concat=concat,
+                             share_rev_etypes=tie_weights,
+                             chunk_size=chunk_size))
+    self.dropout_p = dropout
+    # Only the fused GAT convs benefit from edges sorted by destination.
+    self._sort_edges = any(isinstance(conv, FusedHeteroGATConv)
+                           for conv in self.convs)
 
   def forward(self, x_dict, edge_index_dict):
-    for i, conv in enumerate(self.convs):
-      x_dict = conv(x_dict, edge_index_dict)
-      if i != len(self.convs) - 1:
-        x_dict = {key: F.leaky_relu(x) for key, x in x_dict.items()}
-        x_dict = {key: self.dropout(x) for key, x in x_dict.items()}
-    if hasattr(self, 'lin'): # for node classification
+    is_cuda = next(iter(x_dict.values())).is_cuda
+    if self.autocast_dtype is None or not is_cuda:
+      return self._forward(x_dict, edge_index_dict)
+    with torch.autocast(device_type='cuda', dtype=self.autocast_dtype):
+      out = self._forward(x_dict, edge_index_dict)
+    # The autocast region ends here, so upcast the outputs for the loss.
+    return self._upcast(out)
+
+  def _upcast(self, out):
+    if isinstance(out, dict):
+      return {k: v.float() for k, v in out.items()}
+    return out.float()
+
+  def _forward(self, x_dict, edge_index_dict):
+    x_dict = self._encode(x_dict, edge_index_dict)
+    if self._has_lin: # for node classification
       return self.lin(x_dict[self.node_type])
+    elif self.node_type is not None:
+      return x_dict[self.node_type]
     else:
       return x_dict
+
+  def _encode(self, x_dict, edge_index_dict):
+    # Sort the edges by destination once for all layers, so that the fused
+    # convs run their softmax and aggregation as segment reductions.
+    if self._sort_edges:
+      edge_index_dict = sort_edge_index_dict(edge_index_dict)
+    for i, conv in enumerate(self.convs):
+      if isinstance(conv, FusedHeteroGATConv):
+        x_dict = conv(x_dict, edge_index_dict, is_sorted=True)
+      else:
+        x_dict = conv(x_dict, edge_index_dict)
+      if i != len(self.convs) - 1:
+        xs = list(x_dict.values())
+        if (_HAS_FOREACH_MAXIMUM and not self.training
+            and not torch.is_grad_enabled()):
+          # Without dropout and autograd, apply leaky_relu(x) == max(x, 0.01x)
+          # to all node types with multi-tensor kernels.
+          torch._foreach_maximum_(xs, torch._foreach_mul(xs, 0.01))
+          continue
+        # The conv outputs are freshly allocated, so activate them in-place.
+        # Dropout goes first as an in-place op must not overwrite the result
+        # leaky_relu_ saves for backward, and the two commute since
+        # leaky_relu(c * x) == c * leaky_relu(x) for the dropout scale c >= 0.
+        for x in xs:
+          F.dropout(x, self.dropout_p, self.training, inplace=True)
+          F.leaky_relu_(x)
+    return x_dict
+
+  def jittable(self):
+    r""" Get a TorchScript version of the model, which takes the node
+    features as a list ordered by its ``ntypes`` attribute and the edge
+    indexes as a list ordered by its ``etypes`` attribute, instead of dicts
+    keyed by type. Only node classification with the "rgat" model is
+    supported, all edge types must be present in every batch, and
+    ``autocast_dtype`` is not applied. The scripted model shares the
+    parameters of this model and starts in its training mode. Wrap it with
+    :class:`ScriptRGNNWrapper` to call it with dicts, e.g.:
+
+      model.eval()
+      scripted = model.jittable()
+      out = scripted([x_dict[t] for t in scripted.ntypes],
+                     [edge_index_dict[e] for e in scripted.etypes])
+      out = ScriptRGNNWrapper(scripted)(x_dict, edge_index_dict)
+    """
+    return torch.jit.script(_ScriptRGNN(self))
+
+
+class RGNNClassifier(RGNN):
+  r""" :class:`RGNN` for node classification, which always returns the
+  predictions for ``node_type``, so that its forward does not branch on the
+  kind of output.
+  """
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    if self.node_type is None:
+      raise ValueError(f"'{self.__class__.__name__}': node_type is required")
+
+  def _forward(self, x_dict, edge_index_dict):
+    x = self._encode(x_dict, edge_index_dict)[self.node_type]
+    return self.lin(x) if self._has_lin else x
+
+  def _upcast(self, out):
+    return out.float()
+
+
+class RGNNEmbedding(RGNN):
+  r""" :class:`RGNN` for node embeddings, which always returns the output
+  of the last conv layer for all node types.
+  """
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    if self.node_type is not None:
+      raise ValueError(f"'{self.__class__.__name__}': node_type must be None")
+
+  def _forward(self, x_dict, edge_index_dict):
+    return self._encode(x_dict, edge_index_dict)
+
+  def _upcast(self, out):
+    return {k: v.float() for k, v in out.items()}
+
+
+class _ScriptRGNN(torch.nn.Module):
+  r""" TorchScript compatible counterpart of :class:`RGNN`, see
+  :meth:`RGNN.jittable`.
+  """
+  def __init__(self, model: RGNN):
+    super().__init__()
+    if model.node_type is None:
+      raise ValueError(f"'{self.__class__.__name__}': only node "
+                       f"classification models are supported")
+    for conv in model.convs:
+      if not isinstance(conv, FusedHeteroGATConv):
+        raise ValueError(f"'{self.__class__.__name__}': only the 'rgat' "
+                         f"model is supported")
+    self.etypes = model.etypes
+    self.ntypes = []
+    for src, _, dst in self.etypes:
+      for ntype in (src, dst):
+        if ntype not in self.ntypes:
+          self.ntypes.append(ntype)
+    # The relations are passed to the convs grouped by destination node type,
+    # which is the same for all layers as they share edge types.
+    self.rel_order, self.src_rels, dst_order, self.dst_rels = \
+      _group_relations(self.etypes)
+    etypes = [self.etypes[r] for r in self.rel_order]
+    self.src_types = [self.ntypes.index(etype[0]) for etype in etypes]
+    self.dst_types = [self.ntypes.index(etype[2]) for etype in etypes]
+    if len(dst_order) != len(self.ntypes):
+      raise ValueError(f"'{self.__class__.__name__}': every node type must "
+                       f"be the destination of an edge type")
+    self.dst_group = [dst_order.index(ntype) for ntype in self.ntypes]
+    # The relations in destination and in source order, to look up the
+    # parameter slots of the convs.
+    device = model.convs[0].slot_index.device
+    self.register_buffer('dst_order',
+                         torch.tensor(self.rel_order, device=device),
+                         persistent=False)
+    self.register_buffer('src_order', torch.tensor(
+      [self.rel_order[p] for pos in self.src_rels for p in pos],
+      device=device), persistent=False)
+
+    self.node_index = self.ntypes.index(model.node_type)
+    self.convs = model.convs
+    self.lin = model.lin if model._has_lin else torch.nn.Identity()
+    self.dropout_p = model.dropout_p
+    # A new module starts in training mode, so follow the source model.
+    self.train(model.training)
+
+  def forward(self, xs: List[torch.Tensor],
+              edge_indexes: List[torch.Tensor]) -> torch.Tensor:
+    sorted_edge_indexes: List[torch.Tensor] = []
+    for r in self.rel_order:
+      edge_index = edge_indexes[r]
+      sorted_edge_indexes.append(edge_index[:, edge_index[1].argsort()])
+    for i, conv in enumerate(self.convs):
+      outs = conv.propagate([xs[t] for t in self.src_types],
+                            [xs[t] for t in self.dst_types],
+                            sorted_edge_indexes,
+                            conv.slot_index.index_select(0, self.src_order),
+                            conv.slot_index.index_select(0, self.dst_order),
+                            self.src_rels, self.dst_rels, True)
+      xs = [outs[g] for g in self.dst_group]
+      if i != len(self.convs) - 1:
+        for x in xs:
+          F.dropout(x, self.dropout_p, self.training, True)
+          F.leaky_relu_(x)
+    return self.lin(xs[self.node_index])
+
+
+class ScriptRGNNWrapper(torch.nn.Module):
+  r""" Call a model returned by :meth:`RGNN.jittable` with the node features
+  and edge indexes as dicts keyed by type, like :class:`RGNN`.
+  """
+  def __init__(self, scripted):
+    super().__init__()
+    self.scripted = scripted
+    self.ntypes = list(scripted.ntypes)
+    self.etypes = [tuple(etype) for etype in scripted.etypes]
+
+  def forward(self, x_dict, edge_index_dict):
+    return self.scripted([x_dict[ntype] for ntype in self.ntypes],
+                         [edge_index_dict[etype] for etype in self.etypes])
@@ -0,0 +1,237 @@
+# Copyright 2023 Alibaba Group Holding Limited. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import unittest
+import torch
+
+from torch_geometric.nn import GATConv, HeteroConv
+
+from rgnn import (
+  FusedHeteroGATConv, RGNN, RGNNClassifier, RGNNEmbedding, ScriptRGNNWrapper,
+  sort_edge_index_dict
+)
+
+
+def _reference_conv(fused):
+  r""" Build the ``HeteroConv`` over one ``GATConv`` per edge type that
+  ``fused`` is equivalent to, with its weights copied from ``fused``. Edge
+  types sharing a parameter slot share one ``GATConv``. Returns the
+  ``HeteroConv`` and the ``GATConv`` of each slot.
+  """
+  H, C = fused.heads, fused.out_channels
+  slot_convs = []
+  for s in range(fused.weight.size(0)):
+    conv = GATConv(fused.in_channels, C, heads=H, concat=fused.concat,
+                   add_self_loops=False)
+    # Newer PyG versions name the shared projection ``lin``.
+    lin = getattr(conv, 'lin', None) or conv.lin_src
+    with torch.no_grad():
+      lin.weight.copy_(fused.weight[s].t())
+      conv.att_src.copy_(fused.att_src[s].unsqueeze(0))
+      conv.att_dst.copy_(fused.att_dst[s].unsqueeze(0))
+      conv.bias.copy_(fused.bias[s])
+    slot_convs.append(conv)
+  convs = {etype: slot_convs[s]
+           for etype, s in zip(fused.etypes, fused.slot_index.tolist())}
+  return HeteroConv(convs, aggr='sum'), slot_convs
+
+
+_ETYPES = [('paper', 'cites', 'paper'),
+           ('author', 'writes', 'paper'),
+           ('paper', 'rev_writes', 'author'),
+           ('author', 'affiliated', 'institute')]
+_NUM_NODES = {'paper': 7, 'author': 5, 'institute': 3}
+_NUM_EDGES = 20
+_IN_CHANNELS = 8
+
+
+def _random_graph():
+  r""" Random node features and edges of ``_ETYPES``.
+  """
+  torch.manual_seed(0)
+  x_dict = {ntype: torch.randn(n, _IN_CHANNELS)
+            for ntype, n in _NUM_NODES.items()}
+  edge_index_dict = {
+    (src, rel, dst): torch.stack([
+      torch.randint(_NUM_NODES[src], (_NUM_EDGES, )),
+      torch.randint(_NUM_NODES[dst], (_NUM_EDGES, ))])
+    for src, rel, dst in _ETYPES}
+  return x_dict, edge_index_dict
+
+
+class FusedHeteroGATConvTestCase(unittest.TestCase):
+  def setUp(self):
+    self.x_dict, self.edge_index_dict = _random_graph()
+
+  def check_equivalence(self, concat=True, is_sorted=False, chunk_size=None,
+                        share_rev_etypes=False):
+    fused = FusedHeteroGATConv(_ETYPES, _IN_CHANNELS, 3, heads=2,
+                               concat=concat, chunk_size=chunk_size,
+                               share_rev_etypes=share_rev_etypes)
+    with torch.no_grad():
+      fused.bias.normal_()
+    ref, slot_convs = _reference_conv(fused)
+    edge_index_dict = self.edge_index_dict
+    if is_sorted:
+      edge_index_dict = sort_edge_index_dict(edge_index_dict)
+    x_dict = {k: x.clone().requires_grad_() for k, x in self.x_dict.items()}
+    ref_x_dict = {k: x.clone().requires_grad_()
+                  for k, x in self.x_dict.items()}
+
+    out = fused(x_dict, edge_index_dict, is_sorted=is_sorted)
+    ref_out = ref(ref_x_dict, edge_index_dict)
+    self.assertEqual(set(out.keys()), set(ref_out.keys()))
+    for ntype in ref_out:
+      self.assertTrue(torch.allclose(out[ntype], ref_out[ntype], atol=1e-5))
+
+    sum(x.pow(2).sum() for x in out.values()).backward()
+    sum(x.pow(2).sum() for x in ref_out.values()).backward()
+    for ntype in x_dict:
+      self.assertTrue(torch.allclose(x_dict[ntype].grad,
+                                     ref_x_dict[ntype].grad, atol=1e-5))
+    for s, conv in enumerate(slot_convs):
+      lin = getattr(conv, 'lin', None) or conv.lin_src
+      self.assertTrue(torch.allclose(fused.weight.grad[s],
+                                     lin.weight.grad.t(), atol=1e-5))
+      self.assertTrue(torch.allclose(fused.att_src.grad[s],
+                                     conv.att_src.grad[0], atol=1e-5))
+      self.assertTrue(torch.allclose(fused.att_dst.grad[s],
+                                     conv.att_dst.grad[0], atol=1e-5))
+      self.assertTrue(torch.allclose(fused.bias.grad[s],
+                                     conv.bias.grad, atol=1e-5))
+
+  def test_scatter(self):
+    self.check_equivalence()
+
+  def test_segment(self):
+    self.check_equivalence(is_sorted=True)
+
+  def test_chunked(self):
+    # Under autograd the chunk size is ignored.
+    self.check_equivalence(chunk_size=7)
+    self.check_equivalence(is_sorted=True, chunk_size=7)
+    fused = FusedHeteroGATConv(_ETYPES, _IN_CHANNELS, 3, heads=2,
+                               chunk_size=7)
+    ref, _ = _reference_conv(fused)
+    with torch.no_grad():
+      ref_out = ref(self.x_dict, self.edge_index_dict)
+      for is_sorted in (False, True):
+        edge_index_dict = self.edge_index_dict
+        if is_sorted:
+          edge_index_dict = sort_edge_index_dict(edge_index_dict)
+        out = fused(self.x_dict, edge_index_dict, is_sorted=is_sorted)
+        for ntype in ref_out:
+          self.assertTrue(torch.allclose(out[ntype], ref_out[ntype],
+                                         atol=1e-5))
+
+  def test_share_rev_etypes(self):
+    self.check_equivalence(share_rev_etypes=True)
+    self.check_equivalence(is_sorted=True, share_rev_etypes=True)
+
+  def test_mean_heads(self):
+    self.check_equivalence(concat=False)
+    self.check_equivalence(concat=False, is_sorted=True)
+
+  def test_jittable(self):
+    model = RGNNClassifier(_ETYPES, _IN_CHANNELS, 8, 4,
+                           heads=2, node_type='paper')
+    model.eval()
+    scripted = model.jittable()
+    self.assertFalse(scripted.training)
+    with torch.no_grad():
+      out = model(self.x_dict, self.edge_index_dict)
+      script_out = ScriptRGNNWrapper(scripted)(self.x_dict,
+                                               self.edge_index_dict)
+    self.assertTrue(torch.allclose(out, script_out, atol=1e-5))
+
+
+class RGNNTestCase(unittest.TestCase):
+  def setUp(self):
+    self.x_dict, self.edge_index_dict = _random_graph()
+
+  def test_tie_weights_rgat(self):
+    model = RGNN(_ETYPES, 8, 8, 4, num_layers=3, model='rgat', heads=2,
+                 node_type='paper', tie_weights=True)
+    self.assertIs(model.convs[1], model.convs[0])
+    self.assertIs(model.convs[2], model.convs[0])
+    num_params = sum(p.numel() for p in model.parameters())
+    self.assertEqual(num_params,
+                     sum(p.numel() for p in model.convs[0].parameters()) +
+                     sum(p.numel() for p in model.lin.parameters()))
+
+  def test_tie_weights_rsage(self):
+    model = RGNN(_ETYPES, 8, 8, 4, num_layers=3, model='rsage',
+                 node_type='paper', tie_weights=True)
+    self.assertIs(model.convs[1], model.convs[0])
+    self.assertIs(model.convs[2], model.convs[0])
+    convs = dict(zip(_ETYPES, model.convs[0].convs.values()))
+    self.assertIs(convs[('paper', 'rev_writes', 'author')],
+                  convs[('author', 'writes', 'paper')])
+    # One SAGEConv for each edge type except the reverse one.
+    num_params = sum(p.numel() for p in model.parameters())
+    conv_params = sum(p.numel() for p in convs[_ETYPES[0]].parameters())
+    self.assertEqual(num_params,
+                     3 * conv_params +
+                     sum(p.numel() for p in model.lin.parameters()))
+
+  def test_fuse_lin(self):
+    model = RGNN(_ETYPES, _IN_CHANNELS, 8, 4, heads=2,
+                 node_type='paper', fuse_lin=True)
+    self.assertFalse(hasattr(model, 'lin'))
+    self.assertFalse(model.convs[-1].concat)
+    self.assertEqual(model.convs[-1].out_channels, 4)
+    out = model(self.x_dict, self.edge_index_dict)
+    self.assertEqual(list(out.shape), [_NUM_NODES['paper'], 4])
+
+  @unittest.skipUnless(torch.cuda.is_available(), 'requires CUDA')
+  def test_autocast_bf16(self):
+    model = RGNN(_ETYPES, _IN_CHANNELS, 8, 4, heads=2,
+                 node_type='paper', autocast_dtype=torch.bfloat16).to(0)
+    model.eval()
+    x_dict = {k: x.to(0) for k, x in self.x_dict.items()}
+    edge_index_dict = {k: e.to(0) for k, e in self.edge_index_dict.items()}
+    with torch.no_grad():
+      out = model(x_dict, edge_index_dict)
+      model.autocast_dtype = None
+      ref_out = model(x_dict, edge_index_dict)
+    self.assertEqual(out.dtype, torch.float32)
+    self.assertTrue(torch.allclose(out, ref_out, atol=5e-2, rtol=5e-2))
+
+  def test_autocast_float16(self):
+    with self.assertRaises(ValueError):
+      RGNN(_ETYPES, _IN_CHANNELS, 8, 4, node_type='paper',
+           autocast_dtype=torch.float16)
+
+  def test_classifier(self):
+    model = RGNNClassifier(_ETYPES, _IN_CHANNELS, 8, 4, heads=2,
+                           node_type='paper')
+    out = model(self.x_dict, self.edge_index_dict)
+    self.assertEqual(list(out.shape), [_NUM_NODES['paper'], 4])
+    with self.assertRaises(ValueError):
+      RGNNClassifier(_ETYPES, _IN_CHANNELS, 8, 4)
+
+  def test_embedding(self):
+    model = RGNNEmbedding(_ETYPES, _IN_CHANNELS, 8, 4, heads=2)
+    self.assertFalse(hasattr(model, 'lin'))
+    out = model(self.x_dict, self.edge_index_dict)
+    self.assertEqual(set(out.keys()), set(_NUM_NODES.keys()))
+    for ntype, x in out.items():
+      self.assertEqual(list(x.shape), [_NUM_NODES[ntype], 4])
+    with self.assertRaises(ValueError):
+      RGNNEmbedding(_ETYPES, _IN_CHANNELS, 8, 4, node_type='paper')
+
+
+if __name__ == "__main__":
+  unittest.main()
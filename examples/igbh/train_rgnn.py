@@ -24,7 +24,7 @@ import warnings
 import graphlearn_torch as glt
 
 from dataset import IGBHeteroDataset
-from rgnn import RGNN
+from rgnn import RGNNClassifier
 
 torch.manual_seed(42)
 warnings.filterwarnings("ignore")
@@ -136,9 +136,22 @@ if __name__ == '__main__':
   parser.add_argument('--epochs', type=int, default=20)
   parser.add_argument('--num_layers', type=int, default=6)
   parser.add_argument('--num_heads', type=int, default=4)
+  parser.add_argument('--chunk_size', type=int, default=None,
+      help='number of edges aggregated at a time by the rgat convs in '
+           'evaluation, which saves memory but is slower; ignored in '
+           'training, default is all edges at once')
   parser.add_argument('--log_every', type=int, default=5)
   parser.add_argument("--cpu_mode", action="store_true",
       help="Only use CPU for sampling and training, default is False.")
+  parser.add_argument("--fuse_lin", action="store_true",
+      help="Output the classes from the last conv layer instead of a linear "
+           "classifier, default is False.")
+  parser.add_argument("--autocast_bf16", action="store_true",
+      help="Run the model forward under bfloat16 autocast on GPU, "
+           "default is False.")
+  parser.add_argument("--compile", action="store_true",
+      help="Compile the model with torch.compile (requires torch>=2.0), "
+           "default is False.")
   args = parser.parse_args()
   args.with_gpu = (not args.cpu_mode) and torch.cuda.is_available()
   device = torch.device('cuda' if args.with_gpu else 'cpu')
@@ -181,13 +194,19 @@ if __name__ == '__main__':
                                           drop_last=False,
                                           device=device)
   # model
-  model = RGNN(igbh_dataset.etypes,
-               igbh_dataset.feat_dict['paper'].shape[1],
-               args.hidden_channels,
-               args.num_classes,
-               num_layers=args.num_layers,
-               dropout=0.2,
-               model=args.model,
-               heads=args.num_heads,
-               node_type='paper').to(device)
+  model = RGNNClassifier(igbh_dataset.etypes,
+                         igbh_dataset.feat_dict['paper'].shape[1],
+                         args.hidden_channels,
+                         args.num_classes,
+                         num_layers=args.num_layers,
+                         dropout=0.2,
+                         model=args.model,
+                         heads=args.num_heads,
+                         node_type='paper',
+                         fuse_lin=args.fuse_lin,
+                         autocast_dtype=(torch.bfloat16 if args.autocast_bf16
+                                         else None),
+                         chunk_size=args.chunk_size).to(device)
+  if args.compile:
+    model = torch.compile(model, dynamic=True)
   train(model, device, train_loader, val_loader, test_loader, args)
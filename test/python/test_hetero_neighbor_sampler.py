@@ -20,7 +20,46 @@ import torch
 import graphlearn_torch as glt
 
 
+def _expected_u2i_eids(users):
+  r""" Sorted ids of the u2i edges of ``users``, where user ``u`` owns the
+  edges ``2u`` and ``2u+1``.
+  """
+  return (users.unsqueeze(1) * 2 +
+          torch.arange(2, device=users.device)).reshape(-1).sort().values
+
+
+def _delta_in(edge_index, deltas, vnum=40):
+  r""" Mask of edges ``(u, v)`` in ``edge_index`` with ``(u - v) % vnum`` in
+  ``deltas``, i.e. ``u == (v + k) % vnum`` for some ``k`` in ``deltas``.
+  """
+  diff = (edge_index[0] - edge_index[1]) % vnum
+  mask = diff == deltas[0]
+  for k in deltas[1:]:
+    mask |= diff == k
+  return mask
+
+
+def _node_pair(out, src_type, dst_type, index):
+  r""" Global ids of the node pairs at the local ``index`` of ``out``, as a
+  tensor of shape (2, E).
+  """
+  return torch.stack((out.node[src_type][index[0]],
+                      out.node[dst_type][index[1]]))
+
+
+def _edge_pair(out, etype):
+  r""" Global ids of the sampled edges of ``etype`` in ``out``, as a tensor
+  of shape (2, E).
+  """
+  return _node_pair(out, etype[0], etype[2], (out.row[etype], out.col[etype]))
+
+
 class RandomSamplerTestCase(unittest.TestCase):
+  # seed nodes and edges
+  _NODES = torch.tensor([1, 5, 9, 13, 17, 21, 25, 29])
+  _ROW = torch.tensor([1, 3, 4, 7, 12, 18, 27, 32, 38])
+  _COL = torch.tensor([2, 5, 5, 8, 13, 20, 29, 33, 0])
+
   def setUp(self):
     # options for dataset generation
     self.vnum_total = 40
@@ -34,29 +73,24 @@ class RandomSamplerTestCase(unittest.TestCase):
     self.i2i_etype = ('item', 'i2i', 'item')
     self.rev_u2i_etype = ('item', 'rev_u2i', 'user')
 
-    # graph
-    user_nodes, u2i_rows, u2i_cols, u2i_eids = [], [], [], []
-    for v in range(self.vnum_total):
-        user_nodes.append(v)
-        u2i_rows.extend([v for _ in range(self.degree)])
-        u2i_cols.extend([((v + i + 1) % self.vnum_total) for i in range(self.degree)])
-        u2i_eids.extend([(v * self.degree + i) for i in range(self.degree)])
-    u2i_edge_index = torch.tensor([u2i_rows, u2i_cols], dtype=torch.int64)
-
-    u2i_edge_ids = torch.tensor(u2i_eids, dtype=torch.int64)
-    u2i_csr_topo = glt.data.CSRTopo(edge_index=u2i_edge_index, edge_ids=u2i_edge_ids)
+    # graph, topology is given in int32 and widened by CSRTopo
+    d, V = self.degree, self.vnum_total
+    rows = torch.arange(V, dtype=torch.int32).repeat_interleave(d)
+
+    user_nodes = torch.arange(V, dtype=torch.int64)
+    u2i_cols = (rows + torch.arange(1, d + 1, dtype=torch.int32).repeat(V)) % V
+    u2i_eids = torch.arange(V * d, dtype=torch.int32)
+    u2i_edge_index = torch.stack([rows, u2i_cols])
+
+    u2i_csr_topo = glt.data.CSRTopo(edge_index=u2i_edge_index, edge_ids=u2i_eids)
     u2i_graph = glt.data.Graph(u2i_csr_topo, 'ZERO_COPY', device=0)
 
-    item_nodes, i2i_rows, i2i_cols, i2i_eids = [], [], [], []
-    for v in range(self.vnum_total):
-        item_nodes.append(v)
-        i2i_rows.extend([v for _ in range(self.degree)])
-        i2i_cols.extend([((v + i + 2) % self.vnum_total) for i in range(self.degree)])
-        i2i_eids.extend([(v * self.degree + i) for i in range(self.degree)])
-    i2i_edge_index = torch.tensor([i2i_rows, i2i_cols], dtype=torch.int64)
+    item_nodes = torch.arange(V, dtype=torch.int64)
+    i2i_cols = (rows + torch.arange(2, d + 2, dtype=torch.int32).repeat(V)) % V
+    i2i_eids = torch.arange(V * d, dtype=torch.int32)
+    i2i_edge_index = torch.stack([rows, i2i_cols])
 
-    i2i_edge_ids = torch.tensor(i2i_eids, dtype=torch.int64)
-    i2i_csr_topo = glt.data.CSRTopo(edge_index=i2i_edge_index, edge_ids=i2i_edge_ids)
+    i2i_csr_topo = glt.data.CSRTopo(edge_index=i2i_edge_index, edge_ids=i2i_eids)
     i2i_graph = glt.data.Graph(i2i_csr_topo, 'ZERO_COPY', device=0)
 
     self.graph_dict = {
@@ -64,17 +98,17 @@ class RandomSamplerTestCase(unittest.TestCase):
         self.i2i_etype: i2i_graph
     }
 
-    # feature
+    # feature, ids are dense in [0, V) so id2idx is the identity mapping
     device_group_list = [glt.data.DeviceGroup(0, [0])]
     split_ratio = 0.2
 
     user_nfeat = torch.zeros(len(user_nodes), 512, dtype=torch.float32)
-    user_nfeat_id2idx = glt.utils.id2idx(user_nodes)
+    user_nfeat_id2idx = torch.arange(len(user_nodes), dtype=torch.int64)
     user_feature = glt.data.Feature(user_nfeat, user_nfeat_id2idx,
                                     split_ratio, device_group_list, device=0)
 
-    item_nfeat = torch.ones(len(item_nodes), 256, dtype=torch.float32) + 1
-    item_nfeat_id2idx = glt.utils.id2idx(item_nodes)
+    item_nfeat = torch.full((len(item_nodes), 256), 2.0, dtype=torch.float32)
+    item_nfeat_id2idx = torch.arange(len(item_nodes), dtype=torch.int64)
     item_feature = glt.data.Feature(item_nfeat, item_nfeat_id2idx,
                                     split_ratio, device_group_list, device=0)
 
@@ -83,13 +117,13 @@ class RandomSamplerTestCase(unittest.TestCase):
         self.item_ntype: item_feature
     }
 
-    u2i_efeat = torch.ones(len(u2i_eids), 10, dtype=torch.float32) + 1
-    u2i_efeat_id2idx = glt.utils.id2idx(u2i_eids)
+    u2i_efeat = torch.full((len(u2i_eids), 10), 2.0, dtype=torch.float32)
+    u2i_efeat_id2idx = torch.arange(len(u2i_eids), dtype=torch.int64)
     u2i_feature = glt.data.Feature(u2i_efeat, u2i_efeat_id2idx,
                                     split_ratio, device_group_list, device=0)
 
-    i2i_efeat = torch.ones(len(i2i_eids), 5, dtype=torch.float32) + 3
-    i2i_efeat_id2idx = glt.utils.id2idx(i2i_eids)
+    i2i_efeat = torch.full((len(i2i_eids), 5), 4.0, dtype=torch.float32)
+    i2i_efeat_id2idx = torch.arange(len(i2i_eids), dtype=torch.int64)
     i2i_feature = glt.data.Feature(i2i_efeat, i2i_efeat_id2idx,
                                     split_ratio, device_group_list, device=0)
 
@@ -112,32 +146,18 @@ class RandomSamplerTestCase(unittest.TestCase):
        with_edge=True
     )
     sampler_input = glt.sampler.NodeSamplerInput(
-       node=torch.tensor([1,5,9,13,17,21,25,29]), input_type=self.user_ntype)
+       node=self._NODES, input_type=self.user_ntype)
     sample_out = node_sampler.sample_from_nodes(sampler_input)
 
-    base_homo_edge_index = torch.stack((
-       sample_out.node['item'][sample_out.row[self.i2i_etype]],
-       sample_out.node['item'][sample_out.col[self.i2i_etype]]
-    ))
-    base_hetero_edge_index = torch.stack((
-       sample_out.node['item'][sample_out.row[self.rev_u2i_etype]],
-       sample_out.node['user'][sample_out.col[self.rev_u2i_etype]]
-    ))
-    self.assertTrue(torch.all(
-      ((base_homo_edge_index[1]+2)%40==base_homo_edge_index[0]) +
-      ((base_homo_edge_index[1]+3)%40==base_homo_edge_index[0])
-    ))
-    self.assertTrue(torch.all(
-      ((base_hetero_edge_index[1]+1)%40==base_hetero_edge_index[0]) +
-      ((base_hetero_edge_index[1]+2)%40==base_hetero_edge_index[0])
-    ))
+    base_homo_edge_index = _edge_pair(sample_out, self.i2i_etype)
+    base_hetero_edge_index = _edge_pair(sample_out, self.rev_u2i_etype)
+    self.assertTrue(_delta_in(base_homo_edge_index, (2, 3)).all())
+    self.assertTrue(_delta_in(base_hetero_edge_index, (1, 2)).all())
 
-    base_edge_ids = torch.cat(
-       (sample_out.node['user'] * 2, sample_out.node['user'] * 2 + 1)
-    ).unique()
     self.assertTrue(glt.utils.tensor_equal_with_device(
-       base_edge_ids, sample_out.edge[self.rev_u2i_etype].unique())
-    )
+      _expected_u2i_eids(sample_out.node['user']),
+      sample_out.edge[self.rev_u2i_etype].sort().values
+    ))
 
   def test_hetero_sample_from_edges(self):
     edge_sampler = glt.sampler.NeighborSampler(
@@ -148,44 +168,32 @@ class RandomSamplerTestCase(unittest.TestCase):
     )
     bin_neg_sampling = glt.sampler.NegativeSampling(mode='binary')
     tri_neg_sampling = glt.sampler.NegativeSampling(mode='triplet', amount=2)
+    # seed edges, pinned only here for async copies to device
+    pin_row, pin_col = self._ROW.pin_memory(), self._COL.pin_memory()
     bin_sampler_input = glt.sampler.EdgeSamplerInput(
-       row=torch.tensor([1, 3, 4, 7, 12, 18, 27, 32, 38], device=0),
-       col=torch.tensor([2, 5, 5, 8, 13, 20, 29, 33, 0], device=0),
+       row=pin_row.to(0, non_blocking=True),
+       col=pin_col.to(0, non_blocking=True),
        input_type=self.u2i_etype,
        neg_sampling=bin_neg_sampling
     )
     tri_sampler_input = glt.sampler.EdgeSamplerInput(
-      row=torch.tensor([1, 3, 4, 7, 12, 18, 27, 32, 38], device=0),
-      col=torch.tensor([2, 5, 5, 8, 13, 20, 29, 33, 0], device=0),
+      row=pin_row.to(0, non_blocking=True),
+      col=pin_col.to(0, non_blocking=True),
       input_type=self.u2i_etype,
       neg_sampling=tri_neg_sampling
     )
     
     # check binary cases
     bin_sampler_out = edge_sampler.sample_from_edges(bin_sampler_input)
-    base_homo_edge_index = torch.stack((
-       bin_sampler_out.node['item'][bin_sampler_out.row[self.i2i_etype]],
-       bin_sampler_out.node['item'][bin_sampler_out.col[self.i2i_etype]]
-    ))
-    base_hetero_edge_index = torch.stack((
-       bin_sampler_out.node['item'][bin_sampler_out.row[self.rev_u2i_etype]],
-       bin_sampler_out.node['user'][bin_sampler_out.col[self.rev_u2i_etype]]
-    ))
-    self.assertTrue(torch.all(
-      ((base_homo_edge_index[1]+2)%40==base_homo_edge_index[0]) +
-      ((base_homo_edge_index[1]+3)%40==base_homo_edge_index[0])
-    ))
-    self.assertTrue(torch.all(
-      ((base_hetero_edge_index[1]+1)%40==base_hetero_edge_index[0]) +
-      ((base_hetero_edge_index[1]+2)%40==base_hetero_edge_index[0])
-    ))
+    base_homo_edge_index = _edge_pair(bin_sampler_out, self.i2i_etype)
+    base_hetero_edge_index = _edge_pair(bin_sampler_out, self.rev_u2i_etype)
+    self.assertTrue(_delta_in(base_homo_edge_index, (2, 3)).all())
+    self.assertTrue(_delta_in(base_hetero_edge_index, (1, 2)).all())
 
-    base_edge_ids = torch.cat(
-      (bin_sampler_out.node['user'] * 2, bin_sampler_out.node['user'] * 2 + 1)
-    ).unique()
     self.assertTrue(glt.utils.tensor_equal_with_device(
-      base_edge_ids, bin_sampler_out.edge[self.rev_u2i_etype].unique())
-    )
+      _expected_u2i_eids(bin_sampler_out.node['user']),
+      bin_sampler_out.edge[self.rev_u2i_etype].sort().values
+    ))
     
     self.assertTrue(glt.utils.tensor_equal_with_device(
       bin_sampler_out.metadata['edge_label'][:9],
@@ -199,46 +207,27 @@ class RandomSamplerTestCase(unittest.TestCase):
     base_edge_label_index = torch.stack((
        bin_sampler_input.row, bin_sampler_input.col
     ))
-    pos_index = torch.stack((
-      bin_sampler_out.node['user'][bin_sampler_out.metadata['edge_label_index'][0,:9]],
-      bin_sampler_out.node['item'][bin_sampler_out.metadata['edge_label_index'][1,:9]]
-    ))
+    edge_label_index = bin_sampler_out.metadata['edge_label_index']
+    pos_index = _node_pair(
+      bin_sampler_out, 'user', 'item', edge_label_index[:, :9])
     self.assertTrue(glt.utils.tensor_equal_with_device(
        base_edge_label_index, pos_index
     ))
-    neg_index = torch.stack((
-      bin_sampler_out.node['user'][bin_sampler_out.metadata['edge_label_index'][0,9:]],
-      bin_sampler_out.node['item'][bin_sampler_out.metadata['edge_label_index'][1,9:]]
-    ))
-    self.assertFalse(torch.any(
-      ((neg_index[0]+1)%40==neg_index[1]) + ((neg_index[0]+2)%40==neg_index[1])
-    ))
+    neg_index = _node_pair(
+      bin_sampler_out, 'user', 'item', edge_label_index[:, 9:])
+    self.assertFalse(_delta_in(neg_index.flip(0), (1, 2)).any())
     
     # check triplet cases
     tri_sampler_out = edge_sampler.sample_from_edges(tri_sampler_input)
-    base_homo_edge_index = torch.stack((
-       tri_sampler_out.node['item'][tri_sampler_out.row[self.i2i_etype]],
-       tri_sampler_out.node['item'][tri_sampler_out.col[self.i2i_etype]]
-    ))
-    base_hetero_edge_index = torch.stack((
-       tri_sampler_out.node['item'][tri_sampler_out.row[self.rev_u2i_etype]],
-       tri_sampler_out.node['user'][tri_sampler_out.col[self.rev_u2i_etype]]
-    ))
-    self.assertTrue(torch.all(
-      ((base_homo_edge_index[1]+2)%40==base_homo_edge_index[0]) +
-      ((base_homo_edge_index[1]+3)%40==base_homo_edge_index[0])
-    ))
-    self.assertTrue(torch.all(
-      ((base_hetero_edge_index[1]+1)%40==base_hetero_edge_index[0]) +
-      ((base_hetero_edge_index[1]+2)%40==base_hetero_edge_index[0])
-    ))
+    base_homo_edge_index = _edge_pair(tri_sampler_out, self.i2i_etype)
+    base_hetero_edge_index = _edge_pair(tri_sampler_out, self.rev_u2i_etype)
+    self.assertTrue(_delta_in(base_homo_edge_index, (2, 3)).all())
+    self.assertTrue(_delta_in(base_hetero_edge_index, (1, 2)).all())
 
-    base_edge_ids = torch.cat(
-      (tri_sampler_out.node['user'] * 2, tri_sampler_out.node['user'] * 2 + 1)
-    ).unique()
     self.assertTrue(glt.utils.tensor_equal_with_device(
-      base_edge_ids, tri_sampler_out.edge[self.rev_u2i_etype].unique())
-    )
+      _expected_u2i_eids(tri_sampler_out.node['user']),
+      tri_sampler_out.edge[self.rev_u2i_etype].sort().values
+    ))
 
     base_src_index = tri_sampler_out.node['user'][
        tri_sampler_out.metadata['src_index']]